@@ -23,6 +23,11 @@ from refactor_utils_freq import (
     GeneralEigSolver,
     find_indices,
     test_beam_frequency,
+    gatherDesignVec,
+    computeDiscreteness,
+    writeDesignVec,
+    writeFile,
+    prolongQnPairs,
 )
 
 sys.path.append("../eigenvalue")
@@ -52,10 +57,24 @@ if __name__ == "__main__":
     p.add_argument("--qval", type=float, default=5.0)
     p.add_argument("--lambda0", type=float, default=0.1)
     p.add_argument("--ksrho", type=float, default=1000)
+    p.add_argument("--eig-method", type=str, default="jd", choices=["jd", "lanczos"])
     p.add_argument("--max-jd-size", type=int, default=200)
     p.add_argument("--max-gmres-size", type=int, default=30)
+    p.add_argument("--max-lanczos", type=int, default=60)
+    p.add_argument("--lanczos-shift", type=float, default=-10.0)
+    p.add_argument("--lanczos-restart", type=int, default=0)
     p.add_argument("--num-eigenvalues", type=int, default=10)
 
+    # Parameter sweep
+    p.add_argument(
+        "--parallel-refine",
+        action="store_true",
+        help="run independent refinement chains for all values of --sweep-AR and "
+        "--sweep-ratio concurrently, each on its own sub-communicator",
+    )
+    p.add_argument("--sweep-AR", type=float, nargs="+", default=None)
+    p.add_argument("--sweep-ratio", type=float, nargs="+", default=None)
+
     # Optimization
     p.add_argument(
         "--optimizer",
@@ -85,6 +104,12 @@ if __name__ == "__main__":
     p.add_argument(
         "--qn-type", type=str, default="scaled_bfgs", choices=["bfgs", "scaled_bfgs"]
     )
+    p.add_argument(
+        "--qn-warm-start",
+        action="store_true",
+        help="warm-start the ParOpt quasi-Newton approximation on each refined mesh "
+        "with the interpolated update pairs of the previous step",
+    )
     p.add_argument(
         "--paropt-type",
         type=str,
@@ -103,20 +128,49 @@ if __name__ == "__main__":
     prefix = args.prefix
 
     # Set the communicator
-    comm = MPI.COMM_WORLD
+    world = MPI.COMM_WORLD
+    comm = world
+
+    # For a parameter sweep, the runs don't share any state, hence we split
+    # the processors into groups and each group runs its own refinement chain
+    # with its own communicator and output directory
+    if not args.parallel_refine and (args.sweep_AR or args.sweep_ratio):
+        raise ValueError("--sweep-AR and --sweep-ratio require --parallel-refine")
+
+    if args.parallel_refine:
+        sweep_AR = args.sweep_AR if args.sweep_AR else [args.AR]
+        sweep_ratio = args.sweep_ratio if args.sweep_ratio else [args.ratio]
+        n_runs = max(len(sweep_AR), len(sweep_ratio))
+        if len(sweep_AR) == 1:
+            sweep_AR = sweep_AR * n_runs
+        if len(sweep_ratio) == 1:
+            sweep_ratio = sweep_ratio * n_runs
+        if len(sweep_AR) != n_runs or len(sweep_ratio) != n_runs:
+            raise ValueError("--sweep-AR and --sweep-ratio must have the same length")
+        if world.size < n_runs:
+            raise ValueError(
+                "Not enough processors ({:d}) for {:d} parallel runs".format(
+                    world.size, n_runs
+                )
+            )
+
+        run_id = world.rank * n_runs // world.size
+        comm = world.Split(color=run_id, key=world.rank)
+        args.AR = sweep_AR[run_id]
+        args.ratio = sweep_ratio[run_id]
+        prefix = os.path.join(args.prefix, "run%d" % (run_id))
+
+    # Root of the communicator that runs the refinement loop
+    is_root = comm.rank == 0
 
     # Create prefix directory if not exist
-    if comm.rank == 0 and not os.path.isdir(prefix):
-        os.mkdir(prefix)
+    if is_root:
+        os.makedirs(prefix, exist_ok=True)
 
     # Save the command and arguments that executed this script
-    if comm.rank == 0:
-        cmd = "python " + " ".join(sys.argv)
-        with open(os.path.join(prefix, "exe.sh"), "w") as f:
-            f.write(cmd + "\n")
-
-    # Allow root processor some time to save execution command
-    comm.Barrier()
+    cmd = "python " + " ".join(sys.argv)
+    if world.rank == 0:
+        writeFile(os.path.join(args.prefix, "exe.sh"), (cmd + "\n").encode())
 
     # Compute derived geometry parameters
     lx = args.len0 * args.AR
@@ -156,6 +210,13 @@ if __name__ == "__main__":
     qn_type = args.qn_type
     if args.hessian == "sr1":
         qn_type = "sr1"
+
+    # The warm-started approximation is built here rather than from the options,
+    # the constraint-scaled BFGS model has no equivalent exposed by ParOpt
+    if args.qn_warm_start and args.optimizer != "paropt":
+        raise ValueError("--qn-warm-start requires --optimizer paropt")
+    if args.qn_warm_start and qn_type == "scaled_bfgs":
+        raise ValueError("--qn-warm-start requires --qn-type bfgs or --hessian sr1")
     optimization_options = {
         "algorithm": "tr",
         "output_level": args.output_level,
@@ -203,12 +264,32 @@ if __name__ == "__main__":
         "mma_use_constraint_linearization": True,
     }
 
-    # Set the original filter to NULL
+    # Set the original filter and constraint callback to NULL
     old_filter = None
+    old_constr_callback = None
+
+    # Quasi-Newton update pairs of the previous step and their interpolation on
+    # the current mesh, only used if --qn-warm-start is specified
+    old_qn_pairs = []
+    redu_qn_pairs = []
 
     # Number of mesh refinements we have
     n_refine_steps = args.n_mesh_refine
 
+    # Output file names of all refinement steps
+    def getStepFiles(name):
+        return [os.path.join(prefix, name % (s)) for s in range(n_refine_steps)]
+
+    output_files = getStepFiles("output_file%d.dat")
+    tr_output_files = getStepFiles("tr_output_file%d.dat")
+    mma_output_files = getStepFiles("mma_output_file%d.dat")
+    mma4py_output_files = getStepFiles("mma4py_output_file%d.dat")
+    snopt_output_files = getStepFiles("snopt_output_file%d.dat")
+    print_output_files = getStepFiles("print_output_file%d.dat")
+    ipopt_output_files = getStepFiles("ipopt_output_file%d.dat")
+    dist_files = getStepFiles("distance_solution%d.f5")
+    refine_files = getStepFiles("output_refine%d")
+
     # This is the mesh refinement loop: each step corresponds to a refined mesh
     # except for the first step where the original (coarse) mesh is used
     for step in range(n_refine_steps):
@@ -217,7 +298,7 @@ if __name__ == "__main__":
 
         # Create the optimization problem
         problem, obj_callback, constr_callback = create_problem(
-            prefix=args.prefix,
+            prefix=prefix,
             domain=args.domain,
             forest=forest,
             bcs=bcs,
@@ -233,10 +314,15 @@ if __name__ == "__main__":
             iter_offset=iter_offset,
             eig_scale=args.eig_scale,
             num_eigenvalues=args.num_eigenvalues,
+            eig_method=args.eig_method,
             max_jd_size=args.max_jd_size,
             max_gmres_size=args.max_gmres_size,
+            max_lanczos=args.max_lanczos,
+            lanczos_shift=args.lanczos_shift,
+            lanczos_restart=args.lanczos_restart,
             mscale=args.mscale,
             kscale=args.kscale,
+            prev_constr_callback=old_constr_callback,
         )
 
         # Function handle for qn correction, if specified
@@ -260,11 +346,16 @@ if __name__ == "__main__":
         fixed_dv_idx = getFixedDVIndices(
             forest, args.domain, args.len0, args.AR, args.ratio
         )
+        # The update pairs are only recorded if there is a refined step to use them
+        qn_history_size = 0
+        if args.qn_warm_start and step != n_refine_steps - 1:
+            qn_history_size = args.qn_subspace
         redu_prob = ReducedProblem(
             problem,
             fixed_dv_idx,
             fixed_dv_val=args.fixed_mass,
             qn_correction_func=qn_corr_func,
+            qn_history_size=qn_history_size,
         )
 
         # Check gradient and exit
@@ -295,7 +386,7 @@ if __name__ == "__main__":
             test_beam_frequency(
                 problem,
                 _x,
-                args.prefix,
+                prefix,
                 add_non_design_mass=True,
                 non_design_mass_indices=fixed_dv_idx,
                 mscale=args.mscale,
@@ -305,17 +396,24 @@ if __name__ == "__main__":
 
         if step != 0:  # This is a refined step - interpolation needed
             # Interpolate x from xopt from last refinement step
-            TopOptUtils.interpolateDesignVec(old_filter, _xopt, new_filter, _x)
+            interp = TopOptUtils.interpolateDesignVec(old_filter, _xopt, new_filter, _x)
 
             # copy values from _x to redu_x0
             redu_prob.DVtoreduDV(_x, redu_x0)
             redu_prob.setInitDesignVars(redu_x0)
 
+            # Interpolate the quasi-Newton update pairs from last refinement step,
+            # this is always redone so no pairs of an older mesh are kept around
+            redu_qn_pairs = prolongQnPairs(
+                old_filter, old_qn_pairs, new_filter, problem, redu_prob, interp
+            )
+
         else:  # This is the first step, we just set x0 to 0.95
             redu_x0[:] = 0.95
 
-        # Update filter
+        # Update filter and constraint callback
         old_filter = new_filter
+        old_constr_callback = constr_callback
 
         # Adjust maxiter for optimizer if this is the last refined step
         if n_refine_steps > 1:
@@ -324,18 +422,16 @@ if __name__ == "__main__":
                 mma_options["mma_max_iterations"] = args.niter_finest
 
         # Set output path
-        optimization_options["output_file"] = os.path.join(
-            prefix, "output_file%d.dat" % (step)
-        )
-        optimization_options["tr_output_file"] = os.path.join(
-            prefix, "tr_output_file%d.dat" % (step)
-        )
-        mma_options["mma_output_file"] = os.path.join(
-            prefix, "mma_output_file%d.dat" % (step)
-        )
+        optimization_options["output_file"] = output_files[step]
+        optimization_options["tr_output_file"] = tr_output_files[step]
+        mma_options["mma_output_file"] = mma_output_files[step]
 
-        # Allocate space to store reduced/full optimal x/rho
-        redu_xopt = redu_prob.createDesignVec()
+        # Number of interpolated quasi-Newton pairs accepted for the warm start
+        n_qn_warm_start = 0
+
+        # Allocate space to store reduced/full optimal x/rho, the reduced optimal x
+        # is allocated by the optimizer branches that need it, since ParOpt
+        # returns its own vector
         redu_rhoopt = redu_prob.createDesignVec()
         xopt = problem.getAssembler().createDesignVec()
         rhoopt = problem.getAssembler().createDesignVec()
@@ -374,8 +470,7 @@ if __name__ == "__main__":
             nvars = np.zeros(1, dtype=type(nvars_l))
             comm.Allreduce(np.array([nvars_l]), nvars)
             mmaprob = MMAProblem(comm, nvars[0], nvars_l, redu_prob)
-            out_file = os.path.join(prefix, "mma4py_output_file%d.dat" % (step))
-            mmaopt = MMAOptimizer(mmaprob, out_file)
+            mmaopt = MMAOptimizer(mmaprob, mma4py_output_files[step])
             mmaopt.optimize(args.max_iter)
 
             # Manually create the f5 file
@@ -386,9 +481,7 @@ if __name__ == "__main__":
                 | TACS.OUTPUT_EXTRAS
             )
             f5 = TACS.ToFH5(problem.getAssembler(), TACS.SOLID_ELEMENT, flag)
-            f5.writeToFile(
-                os.path.join(args.prefix, "output_refine{:d}.f5".format(step))
-            )
+            f5.writeToFile(refine_files[step] + ".f5")
 
             # Get optimal objective and constraint
             redu_xopt_vals = mmaopt.getOptimizedDesign()
@@ -399,30 +492,18 @@ if __name__ == "__main__":
             con = cons[0]
 
             # Compute discreteness
-            redu_xopt_g = comm.allgather(np.array(redu_xopt))
-            redu_xopt_g = np.concatenate(redu_xopt_g)
-            discreteness = np.dot(redu_xopt_g, 1.0 - redu_xopt_g) / len(redu_xopt_g)
-
-            # Compute discreteness for rho
-            redu_prob.reduDVtoDV(redu_xopt, xopt.getArray())
-            problem.getTopoFilter().applyFilter(xopt, rhoopt)
-            redu_prob.DVtoreduDV(rhoopt.getArray(), redu_rhoopt)
-            redu_rhoopt_g = comm.allgather(np.array(redu_rhoopt))
-            redu_rhoopt_g = np.concatenate(redu_rhoopt_g)
-            discreteness_rho = np.dot(redu_rhoopt_g, 1.0 - redu_rhoopt_g) / len(
-                redu_rhoopt_g
-            )
+            discreteness = computeDiscreteness(comm, redu_xopt)
 
         # Optimize with openmdao/pyoptsparse wrapper if specified
         elif args.optimizer == "snopt" or args.optimizer == "ipopt":
-            # Create distributed openMDAO component
-            omprob = om.Problem()
+            # Create distributed openMDAO component, the problem lives on the
+            # communicator of this run so parallel runs don't share collectives
+            omprob = om.Problem(comm=comm)
             analysis = ReduOmAnalysis(comm, redu_prob, redu_x0)
             indeps = omprob.model.add_subsystem("indeps", om.IndepVarComp())
 
             # Create global design vector
-            redu_x0_g = comm.allgather(np.array(redu_x0))
-            redu_x0_g = np.concatenate(redu_x0_g)
+            redu_x0_g = gatherDesignVec(comm, redu_x0)
             indeps.add_output("x", redu_x0_g)
             omprob.model.add_subsystem("topo", analysis)
             omprob.model.connect("indeps.x", "topo.x")
@@ -437,12 +518,8 @@ if __name__ == "__main__":
                 omprob.driver.opt_settings["Iterations limit"] = 9999999999999
                 omprob.driver.opt_settings["Major feasibility tolerance"] = 1e-10
                 omprob.driver.opt_settings["Major optimality tolerance"] = 1e-10
-                omprob.driver.opt_settings["Summary file"] = os.path.join(
-                    prefix, "snopt_output_file%d.dat" % (step)
-                )
-                omprob.driver.opt_settings["Print file"] = os.path.join(
-                    prefix, "print_output_file%d.dat" % (step)
-                )
+                omprob.driver.opt_settings["Summary file"] = snopt_output_files[step]
+                omprob.driver.opt_settings["Print file"] = print_output_files[step]
                 omprob.driver.opt_settings["Major print level"] = 1
                 omprob.driver.opt_settings["Minor print level"] = 0
 
@@ -461,9 +538,7 @@ if __name__ == "__main__":
                 omprob.driver.opt_settings["constr_viol_tol"] = 1e-10
                 omprob.driver.opt_settings["dual_inf_tol"] = 1e-10
                 omprob.driver.opt_settings["print_info_string"] = "yes"
-                omprob.driver.opt_settings["output_file"] = os.path.join(
-                    prefix, "ipopt_output_file%d.dat" % (step)
-                )
+                omprob.driver.opt_settings["output_file"] = ipopt_output_files[step]
 
                 if n_refine_steps > 1 and step == n_refine_steps - 1:
                     omprob.driver.opt_settings["max_iter"] = args.niter_finest
@@ -476,32 +551,23 @@ if __name__ == "__main__":
             omprob.run_model()
             omprob.run_driver()
 
-            # Get optimal result from root processor and broadcast
-            if comm.rank == 0:
-                redu_xopt_g = omprob.get_val("indeps.x")  # Global vector
-            else:
-                redu_xopt_g = None
-            redu_xopt_g = comm.bcast(redu_xopt_g, root=0)
+            # Get optimal result from root processor and broadcast, the
+            # global size is known on every rank so no size exchange is needed
+            redu_xopt_g = np.empty(analysis.global_size)
+            if is_root:
+                redu_xopt_g[:] = omprob.get_val("indeps.x")  # Global vector
+            comm.Bcast([redu_xopt_g, MPI.DOUBLE], root=0)
 
             # Create a distributed vector and store the optimal solution
             # to hot-start the optimization on finer mesh
+            redu_xopt = redu_prob.createDesignVec()
             analysis.globalVecToLocalvec(redu_xopt_g, redu_xopt)
 
             # Compute data of interest
-            discreteness = np.dot(redu_xopt_g, 1.0 - redu_xopt_g) / len(redu_xopt_g)
+            discreteness = computeDiscreteness(comm, redu_xopt)
             obj = omprob.get_val("topo.obj")[0]
             con = omprob.get_val("topo.con")[0]
 
-            # Compute discreteness for rho
-            redu_prob.reduDVtoDV(redu_xopt, xopt.getArray())
-            problem.getTopoFilter().applyFilter(xopt, rhoopt)
-            redu_prob.DVtoreduDV(rhoopt.getArray(), redu_rhoopt)
-            redu_rhoopt_g = comm.allgather(np.array(redu_rhoopt))
-            redu_rhoopt_g = np.concatenate(redu_rhoopt_g)
-            discreteness_rho = np.dot(redu_rhoopt_g, 1.0 - redu_rhoopt_g) / len(
-                redu_rhoopt_g
-            )
-
         # Otherwise, use ParOpt.Optimizer to optimize
         else:
             if args.optimizer == "mma":
@@ -510,27 +576,58 @@ if __name__ == "__main__":
             else:
                 # opt = ParOpt.Optimizer(problem, optimization_options)
                 opt = ParOpt.Optimizer(redu_prob, optimization_options)
+
+                # Replace the quasi-Newton approximation of the trust region
+                # subproblem with one that has seen the interpolated update pairs,
+                # the same update and diagonal types as the options-built model
+                # are used, which is kept if there are no pairs to replay
+                if args.qn_warm_start and redu_qn_pairs:
+                    if qn_type == "sr1":
+                        qn = ParOpt.LSR1(redu_prob, subspace=args.qn_subspace)
+                    else:
+                        qn = ParOpt.LBFGS(
+                            redu_prob,
+                            subspace=args.qn_subspace,
+                            update_type=ParOpt.SKIP_NEGATIVE_CURVATURE,
+                            diag_type=ParOpt.YTY_OVER_YTS,
+                        )
+                    # update() returns 0 if the pair is applied as is, and nonzero
+                    # if the curvature condition made it damp or skip the pair
+                    z0 = np.zeros(redu_prob.getNumCons())
+                    for s, y in redu_qn_pairs:
+                        if qn.update(redu_x0, z0, None, s, y) == 0:
+                            n_qn_warm_start += 1
+                    if is_root:
+                        print(
+                            "[QN warm start] {:d}/{:d} interpolated pairs accepted".format(
+                                n_qn_warm_start, len(redu_qn_pairs)
+                            )
+                        )
+
+                    # Keep the options-built model if no pair was accepted
+                    if n_qn_warm_start > 0:
+                        subproblem = ParOpt.QuadraticSubproblem(redu_prob, qn)
+                        opt.setTrustRegionSubproblem(subproblem)
+
             opt.optimize()
             redu_xopt, z, zw, zl, zu = opt.getOptimizedPoint()
 
+            # Save the quasi-Newton update pairs for the next refinement step
+            if args.qn_warm_start:
+                old_qn_pairs = redu_prob.getQnPairs()
+
             # Get optimal objective and constraint
             fail, obj, cons = redu_prob.evalObjCon(redu_xopt)
             con = cons[0]
 
             # Compute discreteness
-            redu_xopt_g = comm.allgather(np.array(redu_xopt))
-            redu_xopt_g = np.concatenate(redu_xopt_g)
-            discreteness = np.dot(redu_xopt_g, 1.0 - redu_xopt_g) / len(redu_xopt_g)
-
-            # Compute discreteness for rho
-            redu_prob.reduDVtoDV(redu_xopt, xopt.getArray())
-            problem.getTopoFilter().applyFilter(xopt, rhoopt)
-            redu_prob.DVtoreduDV(rhoopt.getArray(), redu_rhoopt)
-            redu_rhoopt_g = comm.allgather(np.array(redu_rhoopt))
-            redu_rhoopt_g = np.concatenate(redu_rhoopt_g)
-            discreteness_rho = np.dot(redu_rhoopt_g, 1.0 - redu_rhoopt_g) / len(
-                redu_rhoopt_g
-            )
+            discreteness = computeDiscreteness(comm, redu_xopt)
+
+        # Compute discreteness for rho
+        redu_prob.reduDVtoDV(redu_xopt, xopt.getArray())
+        problem.getTopoFilter().applyFilter(xopt, rhoopt)
+        redu_prob.DVtoreduDV(rhoopt.getArray(), redu_rhoopt)
+        discreteness_rho = computeDiscreteness(comm, redu_rhoopt)
 
         # Manually create the f5 file
         flag = (
@@ -540,13 +637,17 @@ if __name__ == "__main__":
             | TACS.OUTPUT_EXTRAS
         )
         f5 = TACS.ToFH5(problem.getAssembler(), TACS.SOLID_ELEMENT, flag)
-        f5.writeToFile(os.path.join(args.prefix, "output_refine{:d}.f5".format(step)))
+        f5.writeToFile(refine_files[step] + ".f5")
+
+        # Write the optimal reduced design vector to a binary file, the pickle
+        # file below only contains scalar data and metadata
+        writeDesignVec(comm, redu_xopt, refine_files[step] + ".bin")
 
         # Compute infeasibility
-        infeas = np.max([-con, 0])
+        infeas = max(-con, 0.0)
 
-        # Populate _xopt
-        _xopt = problem.createDesignVec()
+        # Populate _xopt, _x is no longer needed in this step so its space is reused
+        _xopt = _x
         redu_prob.reduDVtoDV(redu_xopt, _xopt)
 
         # Solve the generalized eigenvalue problem once to cross-check the feasibility
@@ -569,7 +670,7 @@ if __name__ == "__main__":
         # for ii, e in enumerate(evals): print('[%2d]%15.5e%15.5e'%(ii, e, res[ii]))
 
         # Export data to python pickle file
-        if comm.rank == 0:
+        if is_root:
             # Check data
             print("[Optimum] discreteness:{:20.10e}".format(discreteness))
             print("[Optimum] discrete_rho:{:20.10e}".format(discreteness_rho))
@@ -595,10 +696,16 @@ if __name__ == "__main__":
             pkl["qval"] = args.qval
             pkl["max-jd-size"] = args.max_jd_size
             pkl["max-gmres-size"] = args.max_gmres_size
+            pkl["eig-method"] = args.eig_method
+            pkl["max-lanczos"] = args.max_lanczos
+            pkl["lanczos-shift"] = args.lanczos_shift
+            pkl["lanczos-restart"] = args.lanczos_restart
             pkl["optimizer"] = args.optimizer
             pkl["n-mesh-refine"] = args.n_mesh_refine
             pkl["max-iter"] = args.max_iter
             pkl["qn-correction"] = args.qn_correction
+            pkl["qn-warm-start"] = args.qn_warm_start
+            pkl["qn-warm-start-pairs"] = n_qn_warm_start
             pkl["eig-scale"] = args.eig_scale
             pkl["qn-subspace"] = args.qn_subspace
             pkl["cmd"] = cmd
@@ -614,12 +721,12 @@ if __name__ == "__main__":
 
             if args.optimizer == "paropt":
                 pkl["curvs"] = constr_callback.getQnUpdateCurvs()
-                pkl["n_skipH"] = getNSkipUpdate(
-                    os.path.join(prefix, "tr_output_file%d.dat" % (step))
-                )
+                pkl["n_skipH"] = getNSkipUpdate(tr_output_files[step])
 
-            with open(os.path.join(prefix, "output_refine%d.pkl" % (step)), "wb") as f:
-                pickle.dump(pkl, f)
+            writeFile(
+                refine_files[step] + ".pkl",
+                pickle.dumps(pkl, protocol=pickle.HIGHEST_PROTOCOL),
+            )
 
         # Output for visualization
         assembler = problem.getAssembler()
@@ -632,10 +739,8 @@ if __name__ == "__main__":
                 # Refine based solely on the value of the density variable
                 TopOptUtils.densityBasedRefine(forest, assembler, lower=0.05, upper=0.5)
             else:
-                # Perform refinement based on distance
-                dist_file = os.path.join(prefix, "distance_solution%d.f5" % (step))
-
-                # Compute the characteristic domain length
+                # Perform refinement based on distance, compute the characteristic
+                # domain length first
                 vol = lx * ly * lz
                 domain_length = vol ** (1.0 / 3.0)
                 refine_distance = 0.025 * domain_length
@@ -645,9 +750,24 @@ if __name__ == "__main__":
                     assembler,
                     refine_distance,
                     domain_length=domain_length,
-                    filename=dist_file,
+                    filename=dist_files[step],
                 )
 
             # Repartition the mesh
             forest.balance(1)
             forest.repartition()
+
+    # Collect results of the final refinement step from all parallel runs
+    if args.parallel_refine:
+        if is_root:
+            run_pkl = pkl
+        else:
+            run_pkl = None
+        run_pkls = world.gather(run_pkl, root=0)
+
+        if world.rank == 0:
+            run_pkls = [r for r in run_pkls if r is not None]
+            writeFile(
+                os.path.join(args.prefix, "parallel_refine.pkl"),
+                pickle.dumps(run_pkls, protocol=pickle.HIGHEST_PROTOCOL),
+            )
@@ -34,8 +34,12 @@ class FrequencyConstr:
         lambda0,
         eig_scale=1.0,
         num_eigenvalues=10,
+        eig_method="jd",
         max_jd_size=100,
         max_gmres_size=30,
+        max_lanczos=60,
+        lanczos_shift=-10.0,
+        lanczos_restart=0,
         ksrho=50,
         add_non_design_mass=True,
         mscale=10.0,
@@ -46,9 +50,22 @@ class FrequencyConstr:
             eig_scale: scale the eigenvalues internally in order to acquire better
                        KS approximation with smaller skrho
             num_eigenvalues: number of smallest eigenvalues to compute
+            eig_method: eigensolver, either Jacobi-Davidson ("jd") or Lanczos ("lanczos")
+            max_lanczos: size of the Lanczos subspace
+            lanczos_shift: the shift sigma of the shift-and-invert operator
+                           (A - sigma*I)^{-1} used by the Lanczos eigensolver
+            lanczos_restart: number of restarts of the GMRES solve that applies
+                             the shift-and-invert operator
             ksrho: KS parameter
         """
 
+        # Check input
+        if eig_method != "jd" and eig_method != "lanczos":
+            raise ValueError("Invalid method for eigensolver.")
+        self.eig_method = eig_method
+        self.lanczos_shift = lanczos_shift
+        self.lanczos_restart = lanczos_restart
+
         # Set objects
         self.forest = forest
 
@@ -69,6 +86,7 @@ class FrequencyConstr:
         self.num_eigenvalues = num_eigenvalues
         self.max_jd_size = max_jd_size
         self.max_gmres_size = max_gmres_size
+        self.max_lanczos = max_lanczos
         self.ksrho = ksrho
         self.add_non_design_mass = add_non_design_mass
         self.mscale = mscale
@@ -82,6 +100,7 @@ class FrequencyConstr:
         self.comm = None
         self.oper = None
         self.jd = None
+        self.sep = None
         self.eig = None
 
         # TACS Vectors
@@ -98,6 +117,7 @@ class FrequencyConstr:
         self.k0mat = None
         self.Amat = None
         self.mgmat = None
+        self.ksm_Amat = None
 
         # We keep track of failed qn correction
         self.curvs = []
@@ -145,16 +165,45 @@ class FrequencyConstr:
             self.temp = self.assembler.createDesignVec()
             self.temp_vals = self.temp.getArray()
 
-            # Set up Jacobi-Davidson eigensolver:
-            # Create the operator with given matrix and multigrid preconditioner
-            self.oper = TACS.JDSimpleOperator(self.assembler, self.Amat, self.mg)
+            # Set up Jacobi-Davidson eigensolver
+            if self.eig_method == "jd":
+                # Create the operator with given matrix and multigrid preconditioner
+                self.oper = TACS.JDSimpleOperator(self.assembler, self.Amat, self.mg)
+
+                # Create the eigenvalue solver and set the number of recycling eigenvectors
+                self.jd = TACS.JacobiDavidson(
+                    self.oper,
+                    self.num_eigenvalues,
+                    self.max_jd_size,
+                    self.max_gmres_size,
+                )
+                self.jd.setTolerances(
+                    eig_rtol=1e-6, eig_atol=1e-6, rtol=1e-6, atol=1e-12
+                )
+                self.jd.setThetaCutoff(0.01)
 
-            # Create the eigenvalue solver and set the number of recycling eigenvectors
-            self.jd = TACS.JacobiDavidson(
-                self.oper, self.num_eigenvalues, self.max_jd_size, self.max_gmres_size
-            )
-            self.jd.setTolerances(eig_rtol=1e-6, eig_atol=1e-6, rtol=1e-6, atol=1e-12)
-            self.jd.setThetaCutoff(0.01)
+            # Set up shift-and-invert Lanczos eigensolver with full orthogonalization
+            else:
+                self.eig_tol = 1e-6
+
+                # Apply (A - sigma*I)^{-1} with GMRES preconditioned by the
+                # multigrid, we need a separate matrix to apply the shift
+                is_flexible = 0
+                self.ksm_Amat = self.assembler.createMat()
+                ksm = TACS.KSM(
+                    self.ksm_Amat,
+                    self.mg,
+                    self.max_gmres_size,
+                    self.lanczos_restart,
+                    is_flexible,
+                )
+                ep_oper = TACS.EPShiftInvertOp(self.lanczos_shift, ksm)
+                self.sep = TACS.SEPsolver(
+                    ep_oper, self.max_lanczos, TACS.SEP_FULL, self.assembler.getBcMap()
+                )
+                self.sep.setTolerances(
+                    self.eig_tol, TACS.SEP_SMALLEST, self.num_eigenvalues
+                )
 
             # Compute non-design matrices
             if self.add_non_design_mass:
@@ -195,6 +244,18 @@ class FrequencyConstr:
         # Copy over from A to mgmat
         self.mgmat.copyValues(self.Amat)
 
+        # For shift-and-invert Lanczos, both the underlying matrix of the Krylov
+        # subspace solver and the multigrid preconditioner are shifted:
+        # ksm_Amat = mgmat = A - sigma*I
+        # The solver and its preconditioner are created once and only their
+        # matrices are updated here at each optimization iteration
+        if self.eig_method == "lanczos":
+            self.ksm_Amat.copyValues(self.Amat)
+            self.ksm_Amat.addDiag(-self.lanczos_shift)
+            self.assembler.applyMatBCs(self.ksm_Amat)
+            self.mgmat.addDiag(-self.lanczos_shift)
+            self.assembler.applyMatBCs(self.mgmat)
+
         # Factor the multigrid preconditioner
         self.mg.assembleGalerkinMat()
         self.mg.factor()
@@ -202,63 +263,74 @@ class FrequencyConstr:
         """
         Solve the eigenvalue problem
         """
-        self.jd.setRecycle(self.num_eigenvalues)
-        self.jd.solve(print_flag=True, print_level=1)
-
-        # Check if succeeded, otherwise try again
-        nconvd = self.jd.getNumConvergedEigenvalues()
-        if nconvd < self.num_eigenvalues:
-            if self.comm.rank == 0:
-                print(
-                    "[Warning] Jacobi-Davidson failed to converge"
-                    " for the first run, starting rerun..."
-                )
-
-            self.jd.setRecycle(nconvd)
+        if self.eig_method == "jd":
+            self.jd.setRecycle(self.num_eigenvalues)
+            self.jd.solve(print_flag=True, print_level=1)
 
-            # Update mgmat so that it's positive definite
-            eig0, err = self.jd.extractEigenvalue(0)
-            if eig0 > 0:
+            # Check if succeeded, otherwise try again
+            nconvd = self.jd.getNumConvergedEigenvalues()
+            if nconvd < self.num_eigenvalues:
                 if self.comm.rank == 0:
                     print(
-                        "[mgmat] Smallest eigenvalue is already positive, don't update mgmat!"
+                        "[Warning] Jacobi-Davidson failed to converge"
+                        " for the first run, starting rerun..."
                     )
-            else:
-                self.mgmat.addDiag(-eig0)
-                self.assembler.applyMatBCs(self.mgmat)
-                self.mg.assembleGalerkinMat()
-                self.mg.factor()
 
-            # Rerun the solver
-            self.jd.solve(print_flag=True, print_level=1)
-            nconvd = self.jd.getNumConvergedEigenvalues()
+                self.jd.setRecycle(nconvd)
+
+                # Update mgmat so that it's positive definite
+                eig0, err = self.jd.extractEigenvalue(0)
+                if eig0 > 0:
+                    if self.comm.rank == 0:
+                        print(
+                            "[mgmat] Smallest eigenvalue is already positive, don't update mgmat!"
+                        )
+                else:
+                    self.mgmat.addDiag(-eig0)
+                    self.assembler.applyMatBCs(self.mgmat)
+                    self.mg.assembleGalerkinMat()
+                    self.mg.factor()
+
+                # Rerun the solver
+                self.jd.solve(print_flag=True, print_level=1)
+                nconvd = self.jd.getNumConvergedEigenvalues()
+
+                # If it still fails, raise error, save fail f5 and exit
+                if nconvd < self.num_eigenvalues:
+                    msg = "No enough eigenvalues converged! ({:d}/{:d})".format(
+                        nconvd, self.num_eigenvalues
+                    )
+
+                    # set the unconverged eigenvector as state variable for visualization
+                    for i in range(self.num_eigenvalues):
+                        self.eig[i], error = self.jd.extractEigenvector(i, self.eigv[i])
+                    self.writeFailedEigenvector(nconvd)
+
+                    raise ValueError(msg)
+
+            # Extract eigenvalues and eigenvectors
+            for i in range(self.num_eigenvalues):
+                self.eig[i], error = self.jd.extractEigenvector(i, self.eigv[i])
+
+        else:
+            self.sep.solve(self.comm, print_flag=True)
+
+            # Count the leading eigenpairs that satisfy the tolerance, unconverged
+            # eigenpairs must not enter the KS constraint and its gradient
+            nconvd = self.num_eigenvalues
+            for i in range(self.num_eigenvalues):
+                self.eig[i], error = self.sep.extractEigenvector(i, self.eigv[i])
+                if error > self.eig_tol and nconvd == self.num_eigenvalues:
+                    nconvd = i
 
-            # If it still fails, raise error, save fail f5 and exit
+            # If it fails, raise error, save fail f5 and exit
             if nconvd < self.num_eigenvalues:
                 msg = "No enough eigenvalues converged! ({:d}/{:d})".format(
                     nconvd, self.num_eigenvalues
                 )
-
-                # set the unconverged eigenvector as state variable for visualization
-                for i in range(self.num_eigenvalues):
-                    self.eig[i], error = self.jd.extractEigenvector(i, self.eigv[i])
-                self.assembler.setVariables(self.eigv[nconvd])
-
-                flag_fail = (
-                    TACS.OUTPUT_CONNECTIVITY
-                    | TACS.OUTPUT_NODES
-                    | TACS.OUTPUT_DISPLACEMENTS
-                    | TACS.OUTPUT_EXTRAS
-                )
-                f5_fail = TACS.ToFH5(self.assembler, TACS.SOLID_ELEMENT, flag_fail)
-                f5_fail.writeToFile(os.path.join(self.prefix, "fail.f5"))
-
+                self.writeFailedEigenvector(nconvd)
                 raise ValueError(msg)
 
-        # Extract eigenvalues and eigenvectors
-        for i in range(self.num_eigenvalues):
-            self.eig[i], error = self.jd.extractEigenvector(i, self.eigv[i])
-
         # Adjust eigenvalues and shift matrices back:
         # A <- A - I + old*I
         # i.e. now A = K - lambda0*M
@@ -508,6 +580,22 @@ class FrequencyConstr:
         self.qn_time.append(MPI.Wtime() - t_start)
         return
 
+    def reinitFromRefined(self, prev_constr):
+        """
+        Reuse data from the constraint object of the previous mesh refinement step
+
+        Matrices, vectors and the eigensolver workspace are all tied to the mesh
+        and can't be carried over the refinement. The smallest eigenvalue is an
+        algebraic eigenvalue of the assembled K - lambda0*M, its magnitude shrinks
+        with the element size, so it doesn't carry over as is either. Only a
+        negative eigenvalue is reused as the initial shift of A: the shifted
+        A = K - lambda0*M + (1 - old)*I stays positive definite on the refined mesh
+        since the magnitude of its negative eigenvalue is no larger. A positive
+        one could over-shift A and leave mgmat indefinite, hence it is dropped.
+        """
+        self.old_min_eigval = min(prev_constr.old_min_eigval, 0.0)
+        return
+
     def getQnUpdateCurvs(self):
         return self.curvs
 
@@ -568,6 +656,24 @@ class FrequencyConstr:
 
         return
 
+    def writeFailedEigenvector(self, index):
+        """
+        Set the first unconverged eigenvector as state variable and save it to
+        fail.f5 for visualization
+        """
+        self.assembler.setVariables(self.eigv[index])
+
+        flag_fail = (
+            TACS.OUTPUT_CONNECTIVITY
+            | TACS.OUTPUT_NODES
+            | TACS.OUTPUT_DISPLACEMENTS
+            | TACS.OUTPUT_EXTRAS
+        )
+        f5_fail = TACS.ToFH5(self.assembler, TACS.SOLID_ELEMENT, flag_fail)
+        f5_fail.writeToFile(os.path.join(self.prefix, "fail.f5"))
+
+        return
+
 
 class MassObj:
     """
@@ -632,10 +738,15 @@ def create_problem(
     iter_offset=0,
     eig_scale=1.0,
     num_eigenvalues=10,
+    eig_method="jd",
     max_jd_size=100,
     max_gmres_size=30,
+    max_lanczos=60,
+    lanczos_shift=-10.0,
+    lanczos_restart=0,
     mscale=10.0,
     kscale=1.0,
+    prev_constr_callback=None,
 ):
     """
     Create the TMRTopoProblem object and set up the topology optimization problem.
@@ -653,6 +764,8 @@ def create_problem(
         nlevels (int): number of multigrid levels
         density (float): Density to use for the mass computation
         iter_offset (int): iteration counter offset
+        prev_constr_callback (FrequencyConstr): constraint callback of the previous
+                                                refinement step to reuse data from
 
     Returns:
         TopoProblem: Topology optimization problem instance
@@ -702,11 +815,17 @@ def create_problem(
         ksrho=ksrho,
         eig_scale=eig_scale,
         num_eigenvalues=num_eigenvalues,
+        eig_method=eig_method,
         max_jd_size=max_jd_size,
         max_gmres_size=max_gmres_size,
+        max_lanczos=max_lanczos,
+        lanczos_shift=lanczos_shift,
+        lanczos_restart=lanczos_restart,
         mscale=mscale,
         kscale=kscale,
     )
+    if prev_constr_callback is not None:
+        constr_callback.reinitFromRefined(prev_constr_callback)
     problem.addConstraintCallback(
         1, 1, constr_callback.constraint, constr_callback.constraint_gradient
     )
@@ -718,6 +837,19 @@ def create_problem(
     return problem, obj_callback, constr_callback
 
 
+def getArrayView(vec):
+    """
+    Get a numpy view of the local entries of a full-sized design vector without
+    copying, numpy arrays are returned as they are
+
+    Args:
+        vec (PVec or np.ndarray): vector generated by TMR.TopoProblem
+    """
+    if isinstance(vec, np.ndarray):
+        return vec
+    return TMR.convertPVecToVec(vec).getArray()
+
+
 class ReducedProblem(ParOpt.Problem):
     """
     A reduced problem by fixing some design variables in the original problem
@@ -730,6 +862,7 @@ class ReducedProblem(ParOpt.Problem):
         fixed_dv_val=1.0,
         qn_correction_func=None,
         ncon=1,
+        qn_history_size=0,
     ):
         self.prob = original_prob
         self.assembler = self.prob.getAssembler()
@@ -747,17 +880,28 @@ class ReducedProblem(ParOpt.Problem):
             self._s = self.prob.createDesignVec()
             self._y = self.prob.createDesignVec()
 
+        # Allocate space to save the latest quasi-Newton update pairs in the full-sized
+        # design space, these are used to warm-start the next refinement step
+        self.qn_history_size = qn_history_size
+        self._qn_s = [self.prob.createDesignVec() for _ in range(qn_history_size)]
+        self._qn_y = [self.prob.createDesignVec() for _ in range(qn_history_size)]
+        self._qn_next = 0
+        self._qn_count = 0
+
         # Get indices of fixed design variables, these indices
-        # are with respect to the original full-sized problem
+        # are with respect to the original full-sized problem,
+        # fixed_dv_idx is the list as given, *_dv_arr are index arrays
         self.fixed_dv_idx = fixed_dv_idx
         self.fixed_dv_val = fixed_dv_val
 
-        # Compute the indices of fixed design variables, these indices
-        # are with respect to the original full-sized problem
-        self.free_dv_idx = [
-            i for i in range(len(self._x)) if i not in self.fixed_dv_idx
-        ]
-        self.nvars = len(self.free_dv_idx)
+        # Compute the index arrays of fixed and free design variables from a boolean
+        # mask once, these are used to scatter/gather between the full-sized and
+        # the reduced design vectors at every function and gradient evaluation
+        fixed_dv_mask = np.zeros(len(self._x), dtype=bool)
+        fixed_dv_mask[fixed_dv_idx] = True
+        self.fixed_dv_arr = np.nonzero(fixed_dv_mask)[0]
+        self.free_dv_arr = np.nonzero(~fixed_dv_mask)[0]
+        self.nvars = self.free_dv_arr.size
 
         # Initial dv - can be set by calling setInitDesignVars()
         self.xinit = None
@@ -799,10 +943,8 @@ class ReducedProblem(ParOpt.Problem):
         if self.num_obj_evals % self.save_snapshot_every == 0:
             self.snapshot["iter"].append(self.num_obj_evals)
             self.snapshot["obj"].append(fobj)
-            self.snapshot["infeas"].append(np.max([-con[0], 0]))  # hard-coded
-            x_g = self.comm.allgather(np.array(x))
-            x_g = np.concatenate(x_g)
-            self.snapshot["discreteness"].append(np.dot(x_g, 1.0 - x_g) / len(x_g))
+            self.snapshot["infeas"].append(max(-con[0], 0.0))  # hard-coded
+            self.snapshot["discreteness"].append(computeDiscreteness(self.comm, x))
 
         self.num_obj_evals += 1
 
@@ -831,10 +973,10 @@ class ReducedProblem(ParOpt.Problem):
         else:
             val = fixed_val
 
-        if self.fixed_dv_idx:
-            DV[self.fixed_dv_idx] = val
-        if self.free_dv_idx:
-            DV[self.free_dv_idx] = reduDV[:]
+        # Scatter through the underlying array of the full-sized vector directly
+        full = getArrayView(DV)
+        full[self.fixed_dv_arr] = val
+        full[self.free_dv_arr] = reduDV[:]
 
         return
 
@@ -842,8 +984,8 @@ class ReducedProblem(ParOpt.Problem):
         """
         Convert the full-sized design vector to reduced design vector
         """
-        if self.free_dv_idx:
-            reduDV[:] = DV[self.free_dv_idx]
+        # Gather from the underlying array of the full-sized vector directly
+        reduDV[:] = getArrayView(DV)[self.free_dv_arr]
 
         return
 
@@ -856,12 +998,87 @@ class ReducedProblem(ParOpt.Problem):
             # Update y and copy back
             self.qn_correction_func(self.fixed_dv_idx, z, self._s, self._y)
             self.DVtoreduDV(self._y, y)
+
+        # Save the (corrected) update pair
+        if self.qn_history_size > 0:
+            self.reduDVtoDV(s, self._qn_s[self._qn_next], fixed_val=0.0)
+            self.reduDVtoDV(y, self._qn_y[self._qn_next], fixed_val=0.0)
+            self._qn_next = (self._qn_next + 1) % self.qn_history_size
+            self._qn_count = min(self._qn_count + 1, self.qn_history_size)
         return
 
+    def getQnPairs(self):
+        """
+        Get the saved quasi-Newton update pairs (s, y) in the full-sized design
+        space, ordered from the oldest to the latest
+        """
+        pairs = []
+        for i in range(self._qn_count):
+            k = (self._qn_next - self._qn_count + i) % self.qn_history_size
+            pairs.append((self._qn_s[k], self._qn_y[k]))
+        return pairs
+
     def get_snapshot(self):
         return self.snapshot
 
 
+def prolongQnPairs(old_filter, qn_pairs, new_filter, problem, redu_prob, interp=None):
+    """
+    Interpolate the quasi-Newton update pairs from the previous refinement step
+    to the design space of the reduced problem on the refined mesh
+
+    s is a design step and is interpolated as is. y is a gradient difference, its
+    nodal entries scale with the support volume of each node, which shrinks on the
+    refined mesh, so the interpolated y overstates the curvature. Each y is hence
+    rescaled such that the pair keeps the curvature y^T s measured on the previous
+    mesh. Pairs with non-positive curvature on either mesh are dropped, so all
+    returned pairs satisfy s^T y > 0.
+
+    Args:
+        old_filter (OctForest): filter of the previous refinement step
+        qn_pairs (list): full-sized (s, y) pairs from ReducedProblem.getQnPairs()
+        new_filter (OctForest): filter of the current refinement step
+        problem (TMR.TopoProblem): full-sized problem of the current step
+        redu_prob (ReducedProblem): reduced problem of the current step
+        interp (VecInterp): interpolation between the two filters, built once and
+            shared by all pairs if not provided
+
+    Returns:
+        redu_qn_pairs (list): (s, y) pairs as reduced design vectors
+    """
+    _v = problem.createDesignVec()
+    redu_qn_pairs = []
+    for s, y in qn_pairs:
+        redu_s = redu_prob.createDesignVec()
+        interp = TopOptUtils.interpolateDesignVec(
+            old_filter, s, new_filter, _v, interp=interp
+        )
+        redu_prob.DVtoreduDV(_v, redu_s)
+
+        redu_y = redu_prob.createDesignVec()
+        TopOptUtils.interpolateDesignVec(old_filter, y, new_filter, _v, interp=interp)
+        redu_prob.DVtoreduDV(_v, redu_y)
+
+        # Curvature on the previous and the refined mesh
+        redu_s_vals = redu_s[:]
+        redu_y_vals = redu_y[:]
+        curvs = np.array(
+            [
+                np.dot(getArrayView(y), getArrayView(s)),
+                np.dot(redu_y_vals, redu_s_vals),
+            ]
+        )
+        redu_prob.comm.Allreduce(MPI.IN_PLACE, [curvs, MPI.DOUBLE], op=MPI.SUM)
+        if curvs[0] <= 0.0 or curvs[1] <= 0.0:
+            continue
+
+        # The rescaled pair has the curvature curvs[0] > 0
+        redu_y[:] = (curvs[0] / curvs[1]) * redu_y_vals
+        redu_qn_pairs.append((redu_s, redu_y))
+
+    return redu_qn_pairs
+
+
 def getFixedDVIndices(forest, domain, len0, AR, ratio):
     """
     Get indices for fixed design variables
@@ -942,6 +1159,91 @@ def getFixedDVIndices(forest, domain, len0, AR, ratio):
     return fixed_dv_idx
 
 
+def gatherDesignVec(comm, vec, sizes=None, offsets=None):
+    """
+    Gather a distributed design vector to a global numpy array on all
+    processors using buffer-based MPI instead of pickled python objects
+
+    Args:
+        comm (MPI communicator)
+        vec (indexible array object): local part of the distributed vector
+        sizes (int list): local sizes of all processors, computed if not given
+        offsets (int list): offsets of all processors, computed if not given
+
+    Returns:
+        global_vec (np.ndarray): the global vector
+    """
+    local_vec = np.ascontiguousarray(vec, dtype=np.float64)
+    if sizes is None:
+        sizes = comm.allgather(local_vec.size)
+    sizes = np.array(sizes, dtype="i")
+    if offsets is None:
+        offsets = np.cumsum(sizes) - sizes
+    offsets = np.array(offsets, dtype="i")
+
+    global_vec = np.empty(sizes.sum())
+    comm.Allgatherv([local_vec, MPI.DOUBLE], [global_vec, sizes, offsets, MPI.DOUBLE])
+
+    return global_vec
+
+
+def writeFile(filename, data):
+    """
+    Write a bytes-like object to a file with low-level os.write() calls,
+    the file is truncated if it exists
+
+    Args:
+        filename (str): output file name
+        data (bytes-like): data to write
+    """
+    fd = os.open(filename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        buf = memoryview(data)
+        while buf:
+            buf = buf[os.write(fd, buf) :]
+    finally:
+        os.close(fd)
+    return
+
+
+def writeDesignVec(comm, vec, filename):
+    """
+    Write a distributed design vector to a raw binary file of doubles with
+    collective MPI-IO, the local parts are stored in the order of rank so the
+    file contains the global vector and can be loaded with np.fromfile()
+
+    Args:
+        comm (MPI communicator)
+        vec (indexible array object): local part of the distributed vector
+        filename (str): output file name
+    """
+    local_vec = np.ascontiguousarray(vec, dtype=np.float64)
+    fh = MPI.File.Open(comm, filename, MPI.MODE_WRONLY | MPI.MODE_CREATE)
+    fh.Set_size(0)
+    fh.Write_ordered([local_vec, MPI.DOUBLE])
+    fh.Close()
+    return
+
+
+def computeDiscreteness(comm, vec):
+    """
+    Compute the discreteness measure of a distributed design vector:
+
+    discreteness = x^T (1 - x) / n = (sum(x) - x^T x) / n
+
+    Only the local partial sums and sizes are reduced across processors,
+    so the global vector is never formed.
+
+    Args:
+        comm (MPI communicator)
+        vec (indexible array object): local part of the distributed vector
+    """
+    x = np.asarray(vec, dtype=np.float64)
+    local = np.array([x.sum(), np.dot(x, x), x.size], dtype=np.float64)
+    comm.Allreduce(MPI.IN_PLACE, [local, MPI.DOUBLE], op=MPI.SUM)
+    return (local[0] - local[1]) / local[2]
+
+
 class ReduOmAnalysis(om.ExplicitComponent):
     """
     This class wraps the analyses with openmdao interface such that
@@ -1054,12 +1356,12 @@ class ReduOmAnalysis(om.ExplicitComponent):
         if fail:
             raise RuntimeError("Failed to evaluate objective and constraints!")
         else:
-            global_g = self.comm.allgather(np.array(self.g))
-            global_g = np.concatenate(global_g)
+            global_g = gatherDesignVec(self.comm, self.g, self.sizes, self.offsets)
             global_A = []
             for i in range(self.ncon):
-                global_A.append(self.comm.allgather(np.array(self.A[i])))
-                global_A[i] = np.concatenate(global_A[i])
+                global_A.append(
+                    gatherDesignVec(self.comm, self.A[i], self.sizes, self.offsets)
+                )
 
             partials["obj", "x"] = global_g
             partials["con", "x"] = global_A
@@ -1180,7 +1482,11 @@ class GeneralEigSolver:
             self.mmat.axpy(1.0, m0mat)
             self.assembler.applyMatBCs(self.mmat)
 
-        self.mg.assembleMatType(TACS.STIFFNESS_MATRIX)
+        # The multigrid is created with Galerkin coarse operators, so only the
+        # finest matrix is copied and coarser levels are formed as R*K*P instead
+        # of being re-assembled element by element on every level
+        self.mg.getMat().copyValues(self.kmat)
+        self.mg.assembleGalerkinMat()
         self.mg.factor()
 
         # Solve and check success
@@ -51,7 +51,9 @@ void TMR_CreateTACSMg(int num_levels, TACSAssembler *assembler[],
   TACSMg *mg =
       new TACSMg(comm, num_levels, omega, mg_smooth_iters, mg_sor_symm);
 
-  // Create the intepolation/restriction objects between mesh levels
+  // Create the interpolation objects between mesh levels. TACSMg applies
+  // the restriction as the transpose of each interpolation (multTranspose),
+  // so no separate restriction operator is assembled or stored.
   for (int level = 0; level < num_levels - 1; level++) {
     // Create the interpolation object
     TACSBVecInterp *interp =
@@ -126,7 +128,9 @@ void TMR_CreateTACSMg(int num_levels, TACSAssembler *assembler[],
   TACSMg *mg =
       new TACSMg(comm, num_levels, omega, mg_smooth_iters, mg_sor_symm);
 
-  // Create the intepolation/restriction objects between mesh levels
+  // Create the interpolation objects between mesh levels. TACSMg applies
+  // the restriction as the transpose of each interpolation (multTranspose),
+  // so no separate restriction operator is assembled or stored.
   for (int level = 0; level < num_levels - 1; level++) {
     // Create the interpolation object
     TACSBVecInterp *interp =
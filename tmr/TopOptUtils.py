@@ -267,7 +267,7 @@ def compute3DTractionLoad(name, forest, assembler, tr):
     return computeTractionLoad(name, forest, assembler, trac)
 
 
-def interpolateDesignVec(orig_filter, orig_vec, new_filter, new_vec):
+def interpolateDesignVec(orig_filter, orig_vec, new_filter, new_vec, interp=None):
     """
     This function interpolates a design vector from the original design space defined
     on an OctForest or QuadForest and interpolates it to a new OctForest or QuadForest.
@@ -279,6 +279,11 @@ def interpolateDesignVec(orig_filter, orig_vec, new_filter, new_vec):
         orig_vec (PVec): Design variables on the original mesh in a ParOpt.PVec
         new_filter (OctForest or QuadForest): New filter Oct or QuadForest object
         new_vec (PVec): Design variables on the new mesh in a ParOpt.PVec (set on ouput)
+        interp (VecInterp): Interpolation returned by a previous call between the same
+            pair of filters, reused instead of being rebuilt (optional)
+
+    Returns:
+        interp (VecInterp): The interpolation object between the two design spaces
     """
 
     # Convert the PVec class to TACSBVec
@@ -292,19 +297,20 @@ def interpolateDesignVec(orig_filter, orig_vec, new_filter, new_vec):
     if orig_x.getVarsPerNode() != new_x.getVarsPerNode():
         raise ValueError("Number of variables per node must be consistent")
 
-    orig_map = orig_x.getNodeMap()
-    new_map = new_x.getNodeMap()
-    vars_per_node = orig_x.getVarsPerNode()
-
     # Create the interpolation class
-    interp = TACS.VecInterp(orig_map, new_map, vars_per_node)
-    new_filter.createInterpolation(orig_filter, interp)
-    interp.initialize()
+    if interp is None:
+        orig_map = orig_x.getNodeMap()
+        new_map = new_x.getNodeMap()
+        vars_per_node = orig_x.getVarsPerNode()
+
+        interp = TACS.VecInterp(orig_map, new_map, vars_per_node)
+        new_filter.createInterpolation(orig_filter, interp)
+        interp.initialize()
 
     # Perform the interpolation
     interp.mult(orig_x, new_x)
 
-    return
+    return interp
 
 
 def addNaturalFrequencyConstraint(problem, omega_min, **kwargs):
@@ -514,16 +520,9 @@ def approxDistanceRefine(
         filename=filename,
     )
 
-    # Create refinement array
+    # Create refinement array, apply the refinement criteria to all elements at once
     num_elems = assembler.getNumElements()
-    refine = np.zeros(num_elems, dtype=np.int32)
-
-    for i in range(num_elems):
-        # Apply the refinement criteria
-        if dist[i] <= refine_distance:
-            refine[i] = 1
-        else:
-            refine[i] = -1
+    refine = np.where(dist[:num_elems] <= refine_distance, 1, -1).astype(np.int32)
 
     # Refine the forest
     forest.refine(refine, min_lev=min_lev, max_lev=max_lev)